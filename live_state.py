@@ -0,0 +1,317 @@
+import os
+import struct
+import sys
+import time
+from multiprocessing import shared_memory
+
+# --- STARE LIVE ÎN MEMORIE PARTAJATĂ ---
+# Controller-ul publică aici ultimul vector DR trimis și ultimul vector capturat,
+# ca alte procese locale (dashboard, logger) să poată citi pinii fără o a doua
+# conexiune la OpenOCD și fără trafic JTAG suplimentar.
+#
+# Layout segment:
+#   [0:8]   seq      (u64) - impar = scriere în curs, par = stare consistentă
+#   [8:12]  capacity (u32) - număr maxim de biți per vector
+#   [12:16] nbits    (u32) - lungimea vectorului curent
+#   [16:20] pid      (u32) - procesul care a creat segmentul (writer-ul)
+#   [20:24] closed   (u32) - 1 după ce writer-ul a încheiat sesiunea
+#   [24:24+cap]           - vectorul DR trimis (ASCII '0'/'1', exact literalul dat lui drscan)
+#   [24+cap:24+2*cap]     - vectorul capturat (ASCII '0'/'1', hex-ul din răspunsul OpenOCD, MSB primul)
+# Un vector necunoscut (nepublicat încă / captură neparsată) e umplut cu UNKNOWN.
+# Atenție: ordinea biților din vectorul capturat față de cel trimis nu a fost
+# verificată pe un răspuns drscan real.
+#
+# Verificare rapidă, fără hardware (seqlock + parse_captured din main.py):
+#   python live_state.py --check
+
+SHM_NAME = "jtag_bsr_live"
+HEADER = struct.Struct("<QIIII")
+UNKNOWN = "x"
+OWNER_CHECK_AFTER = 0.5  # Secunde cu seq impar după care verificăm dacă writer-ul mai trăiește
+
+# Segmentele create de un LiveStateWriter din procesul curent (vezi _attach)
+_owned = set()
+
+
+def _pid_alive(pid):
+    # os.kill(pid, 0) e test de existență doar pe POSIX; pe Windows semnalul 0 e CTRL_C_EVENT.
+    # Acolo presupunem că procesul trăiește (segmentul există doar cât e ținut deschis).
+    if os.name != "posix":
+        return True
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def _attach(name):
+    # Cititorii nu dețin segmentul: nu trebuie să rămână înregistrați la resource_tracker,
+    # altfel acesta face unlink la ieșirea procesului
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    shm = shared_memory.SharedMemory(name=name)
+    if name not in _owned:
+        # Dacă writer-ul e în același proces, înregistrarea e a lui și o păstrăm
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, "shared_memory")
+    return shm
+
+
+class LiveStateWriter:
+    def __init__(self, capacity, name=SHM_NAME):
+        self.capacity = capacity
+        self.name = name
+        size = HEADER.size + 2 * capacity
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Refolosim numele doar dacă procesul care l-a creat nu mai rulează
+            old = _attach(name)
+            owner = HEADER.unpack_from(old.buf, 0)[3] if old.size >= HEADER.size else 0
+            old.close()
+            if owner and _pid_alive(owner):
+                raise RuntimeError(f"Eroare: Segmentul de memorie partajată '{name}' este folosit "
+                                   f"de procesul {owner}. Alege alt nume cu --shm.")
+            try:
+                shared_memory.SharedMemory(name=name).unlink()
+            except FileNotFoundError:
+                pass
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        _owned.add(name)
+        self.seq = 0
+        HEADER.pack_into(self.shm.buf, 0, self.seq, capacity, 0, os.getpid(), 0)
+        print(f"[*] Stare live publicată în memoria partajată: {self.shm.name}")
+
+    def publish(self, driven=None, captured=None):
+        # driven / captured: șiruri de '0'/'1'; None = necunoscut (regiunea devine UNKNOWN)
+        lengths = {len(v) for v in (driven, captured) if v is not None}
+        if not lengths:
+            return
+        if len(lengths) > 1 or max(lengths) > self.capacity:
+            raise ValueError(f"Vector invalid pentru segmentul live (capacitate {self.capacity} biți)")
+        if any(v is not None and v.strip("01") for v in (driven, captured)):
+            raise ValueError("Vector invalid pentru segmentul live: sunt permise doar caracterele '0' și '1'")
+        nbits = lengths.pop()
+        placeholder = (UNKNOWN * nbits).encode('ascii')
+        driven = driven.encode('ascii') if driven is not None else placeholder
+        captured = captured.encode('ascii') if captured is not None else placeholder
+
+        def write(buf):
+            struct.pack_into("<I", buf, 12, nbits)
+            buf[HEADER.size:HEADER.size + nbits] = driven
+            off = HEADER.size + self.capacity
+            buf[off:off + nbits] = captured
+
+        self._write(write)
+
+    def _write(self, fn):
+        # Seqlock: seq impar cât timp scriem, apoi par când datele sunt consistente.
+        # finally: un seq rămas impar ar bloca cititorii (ex. KeyboardInterrupt în mijloc)
+        buf = self.shm.buf
+        self.seq += 1
+        struct.pack_into("<Q", buf, 0, self.seq)
+        try:
+            fn(buf)
+        finally:
+            self.seq += 1
+            struct.pack_into("<Q", buf, 0, self.seq)
+
+    def close(self):
+        if self.shm.buf is not None:
+            # Marcăm sesiunea ca încheiată: cititorii deja atașați păstrează maparea după unlink
+            self._write(lambda buf: struct.pack_into("<I", buf, 20, 1))
+            self.shm.close()
+        _owned.discard(self.name)
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class LiveStateReader:
+    def __init__(self, name=SHM_NAME):
+        self.shm = _attach(name)
+        _, self.capacity, _, self.owner, _ = HEADER.unpack_from(self.shm.buf, 0)
+
+    def owner_alive(self):
+        return _pid_alive(self.owner)
+
+    def _read(self, fn):
+        # Reîncercăm până prindem o stare în care writer-ul nu a scris între cele două citiri ale seq
+        buf = self.shm.buf
+        deadline = None
+        while True:
+            seq1 = struct.unpack_from("<Q", buf, 0)[0]
+            if seq1 & 1:
+                # Writer-ul poate fi murit în mijlocul scrierii: nu așteptăm la nesfârșit
+                if deadline is None:
+                    deadline = time.monotonic() + OWNER_CHECK_AFTER
+                elif time.monotonic() > deadline:
+                    if not self.owner_alive():
+                        raise RuntimeError(f"Eroare: Writer-ul (procesul {self.owner}) s-a oprit în mijlocul unei scrieri.")
+                    deadline = time.monotonic() + OWNER_CHECK_AFTER
+                time.sleep(0)
+                continue
+            nbits, closed = struct.unpack_from("<I", buf, 12)[0], struct.unpack_from("<I", buf, 20)[0]
+            if closed:
+                raise RuntimeError("Sesiunea live s-a încheiat (writer-ul a închis segmentul).")
+            result = fn(buf, nbits)
+            if struct.unpack_from("<Q", buf, 0)[0] == seq1:
+                return seq1 // 2, result
+
+    def snapshot(self):
+        # Returnează (nr_actualizare, vector_trimis, vector_capturat)
+        def copy(buf, nbits):
+            cap_off = HEADER.size + self.capacity
+            return (bytes(buf[HEADER.size:HEADER.size + nbits]).decode('ascii'),
+                    bytes(buf[cap_off:cap_off + nbits]).decode('ascii'))
+
+        update, (driven, captured) = self._read(copy)
+        return update, driven, captured
+
+    def pins(self, cell_idxs):
+        # Citim doar biții ceruți, toți din aceeași actualizare (o singură trecere prin seqlock).
+        # Returnează (nr_actualizare, nbits, {celulă: (trimis, capturat) sau None dacă e în afara vectorului}).
+        # cell_idx e indexul din BSDL; vectorul trimis e stocat inversat (ca în perform_toggle),
+        # iar bitul capturat e citit de la aceeași poziție (corespondență neverificată pe hardware).
+        def read(buf, nbits):
+            cap_off = HEADER.size + self.capacity
+            states = {}
+            for idx in cell_idxs:
+                if 0 <= idx < nbits:
+                    pos = nbits - 1 - idx
+                    states[idx] = (chr(buf[HEADER.size + pos]), chr(buf[cap_off + pos]))
+                else:
+                    states[idx] = None
+            return nbits, states
+
+        update, (nbits, states) = self._read(read)
+        return update, nbits, states
+
+    def pin(self, cell_idx):
+        return self.pins([cell_idx])[2][cell_idx]
+
+    def close(self):
+        self.shm.close()
+
+
+def check():
+    # Verificări fără hardware; se opresc cu AssertionError la prima problemă
+    from main import JTAGController
+    name = f"{SHM_NAME}_check_{os.getpid()}"
+
+    writer = LiveStateWriter(8, name)
+    try:
+        try:
+            LiveStateWriter(8, name)
+            raise AssertionError("al doilea writer pe același nume trebuia refuzat")
+        except RuntimeError:
+            pass
+
+        reader = LiveStateReader(name)
+        assert reader.snapshot() == (0, "", "")
+        writer.publish(driven="0101")
+        assert reader.snapshot() == (1, "0101", "xxxx")
+        assert reader.pin(0) == ("1", "x")
+        writer.publish(driven="00000011", captured="11110000")
+        assert reader.snapshot() == (2, "00000011", "11110000")
+        assert reader.pins([0, 7, 8]) == (2, 8, {0: ("1", "0"), 7: ("0", "1"), 8: None})
+        writer.publish(captured="10")
+        assert reader.snapshot() == (3, "xx", "10")
+        try:
+            writer.publish(driven="01ă0")
+            raise AssertionError("vectorul non-binar trebuia refuzat")
+        except ValueError:
+            pass
+        assert reader.snapshot() == (3, "xx", "10")  # seq a rămas par, nu blocăm
+    finally:
+        writer.close()
+    writer.close()  # al doilea close nu trebuie să arunce
+    try:
+        reader.snapshot()
+        raise AssertionError("cititorul trebuia să vadă sesiunea încheiată")
+    except RuntimeError:
+        pass
+    reader.close()
+
+    # Writer mort în mijlocul unei scrieri: seq impar + PID-ul unui proces terminat
+    import subprocess
+    dead = subprocess.Popen([sys.executable, "-c", ""])
+    dead.wait()
+    writer = LiveStateWriter(8, name)
+    try:
+        HEADER.pack_into(writer.shm.buf, 0, 1, 8, 0, dead.pid, 0)
+        reader = LiveStateReader(name)
+        try:
+            reader.snapshot()
+            raise AssertionError("cititorul trebuia să detecteze writer-ul mort")
+        except RuntimeError:
+            pass
+        reader.close()
+    finally:
+        writer.close()
+
+    parse = JTAGController.parse_captured
+    assert parse("drscan xc7a100t.tap 8 0\r\nf0\r\n> ", 8) == "11110000"
+    assert parse("3a5\n", 10) == "1110100101"
+    assert parse("add\n", 8) is None
+    assert parse("f\n", 8) is None
+    assert parse("", 8) is None
+    print("OK: verificările live_state au trecut.")
+
+
+def main():
+    # Monitor simplu: afișează stările pentru celulele date ca argumente
+    import argparse
+    parser = argparse.ArgumentParser(description='Monitor pentru starea live a registrului BSR')
+    parser.add_argument('cells', type=int, nargs='*', help='Indecșii celulelor BSDL de urmărit')
+    parser.add_argument('--name', type=str, default=SHM_NAME, help='Numele segmentului de memorie partajată')
+    parser.add_argument('--interval', type=float, default=0.1, help='Perioada de citire (secunde)')
+    parser.add_argument('--check', action='store_true', help='Rulează verificările fără hardware și ieși')
+    args = parser.parse_args()
+
+    if args.check:
+        check()
+        return
+    if not args.cells:
+        parser.error("trebuie dată cel puțin o celulă")
+
+    try:
+        reader = LiveStateReader(args.name)
+    except FileNotFoundError:
+        print(f"EROARE: Segmentul {args.name} nu există. Rulează main.py cu --shm.")
+        sys.exit(1)
+
+    out_of_range = [c for c in args.cells if not 0 <= c < reader.capacity]
+    if out_of_range:
+        print(f"EROARE: Celulele {out_of_range} sunt în afara vectorului publicat ({reader.capacity} biți).")
+        sys.exit(1)
+
+    last = None
+    try:
+        while True:
+            if not reader.owner_alive():
+                print(f"[*] Writer-ul (procesul {reader.owner}) nu mai rulează; sesiunea s-a încheiat.")
+                break
+            try:
+                update, nbits, states = reader.pins(args.cells)
+            except RuntimeError as e:
+                print(f"[*] {e}")
+                break
+            if update != last:
+                last = update
+                states = ", ".join(f"{c}: {s}" if s is not None else f"{c}: în afara vectorului ({nbits} biți)"
+                                   for c, s in states.items())
+                print(f"[{update}] {states}")
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        reader.close()
+
+
+if __name__ == "__main__":
+    main()
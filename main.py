@@ -1,18 +1,23 @@
+import re
 import socket
 import time
 import argparse
 import sys
 from cb_parser import parse_file
+from live_state import LiveStateWriter, SHM_NAME
 
 # --- CONFIGURARE JTAG / OPENOCD ---
 HOST = "127.0.0.1"
 PORT = 4444  # Portul Telnet implicit al OpenOCD
 TAP_NAME = "xc7a100t.tap"  # Trebuie să coincidă cu ce ai în artix7.cfg
 BSDL_FILE = "plm4.bsdl"
+BOUNDARY_LEN = 989  # Lungimea vectorului DR trimis de perform_toggle (valoarea din BSDL-ul tău)
 
 
 class JTAGController:
-    def __init__(self, host, port):
+    def __init__(self, host, port, live_state=None):
+        # live_state: LiveStateWriter opțional, pentru monitoare locale (vezi live_state.py)
+        self.live_state = live_state
         self.tn = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
         try:
             self.tn.connect((host, port))
@@ -38,12 +43,29 @@ class JTAGController:
     def write_dr(self, bit_string):
         # bit_string trebuie să fie lungimea registrului BSR (ex: 989)
         # Atenție: JTAG trimite LSB first, verifică ordinea în funcție de bsdl
-        self.send_cmd(f"drscan {TAP_NAME} {len(bit_string)} {bit_string}")
+        response = self.send_cmd(f"drscan {TAP_NAME} {len(bit_string)} {bit_string}")
+        if self.live_state is not None:
+            # Vectorul capturat e publicat în ordinea din hex-ul OpenOCD (MSB primul);
+            # corespondența cu ordinea lui bit_string nu a fost verificată pe hardware
+            self.live_state.publish(driven=bit_string, captured=self.parse_captured(response, len(bit_string)))
+        return response
+
+    @staticmethod
+    def parse_captured(response, nbits):
+        # OpenOCD răspunde la drscan cu valoarea capturată în hex, pe o linie separată,
+        # cu exact ceil(nbits/4) cifre. Orice altceva (răspuns parțial, text) -> None
+        digits = (nbits + 3) // 4
+        pattern = re.compile(rf'[0-9a-fA-F]{{{digits}}}')
+        for line in reversed(response.splitlines()):
+            line = line.strip()
+            if pattern.fullmatch(line):
+                return format(int(line, 16), f'0{nbits}b')[-nbits:]
+        return None
 
 
 def perform_toggle(controller, bsdl, target_cells, duration=0.5):
     # Resetăm tot registrul la '0' (safe state)
-    boundary_len = 989  # Valoarea din BSDL-ul tău
+    boundary_len = BOUNDARY_LEN
 
     for cell_info in target_cells:
         port = cell_info['port']
@@ -69,6 +91,8 @@ def main():
     parser = argparse.ArgumentParser(description='JTAG Boundary Scan Tool pentru Xilinx')
     parser.add_argument('--pin', type=str, help='Numele pinului din BSDL (ex: IO_U8)')
     parser.add_argument('--all', action='store_true', help='Toggle secvențial pe toți pinii de output')
+    parser.add_argument('--shm', type=str, nargs='?', const=SHM_NAME, default=None,
+                        help=f'Publică starea DR în memorie partajată (implicit: {SHM_NAME})')
     args = parser.parse_args()
 
     # 1. Parsare BSDL
@@ -93,22 +117,30 @@ def main():
             })
     print(output_map)
     # 3. Execuție
-    jtag = JTAGController(HOST, PORT)
-    jtag.set_extest()
-
-    if args.pin:
-        target = [item for item in output_map if item['port'] == args.pin.upper()]
-        if not target:
-            print(f"EROARE: Pinul {args.pin} nu a fost găsit ca fiind de OUTPUT.")
-            return
-        perform_toggle(jtag, bsdl_obj, target)
-
-    elif args.all:
-        print(f"[*] Începem toggle secvențial pentru {len(output_map)} pini...")
-        perform_toggle(jtag, bsdl_obj, output_map, duration=0.1)
-
-    else:
-        parser.print_help()
+    live_state = None
+    try:
+        # Segmentul e dimensionat după vectorul trimis efectiv, nu după BSDL
+        if args.shm:
+            live_state = LiveStateWriter(BOUNDARY_LEN, args.shm)
+        jtag = JTAGController(HOST, PORT, live_state)
+        jtag.set_extest()
+
+        if args.pin:
+            target = [item for item in output_map if item['port'] == args.pin.upper()]
+            if not target:
+                print(f"EROARE: Pinul {args.pin} nu a fost găsit ca fiind de OUTPUT.")
+                return
+            perform_toggle(jtag, bsdl_obj, target)
+
+        elif args.all:
+            print(f"[*] Începem toggle secvențial pentru {len(output_map)} pini...")
+            perform_toggle(jtag, bsdl_obj, output_map, duration=0.1)
+
+        else:
+            parser.print_help()
+    finally:
+        if live_state is not None:
+            live_state.close()
 
 
 if __name__ == "__main__":